@@ -1,49 +1,58 @@
 """Analytics queries for chess club data."""
 
 import sqlite3
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 
-def get_player_stats(conn: sqlite3.Connection) -> list[dict]:
+def get_player_stats(conn: sqlite3.Connection) -> Iterator[sqlite3.Row]:
     """
     Aggregate stats per player (as white + as black).
-    Returns list of dicts with player summary.
+    Yields sqlite3.Row (index by column name) per player as the cursor produces them.
     """
-    # Union white and black players, then aggregate
+    # Aggregate each color on its own covering index, then fold the two
+    # per-player partials together. Averages are carried as (sum, count)
+    # so they combine exactly across colors. Averages are left unrounded;
+    # callers format them for display (SQLite yields NULL for x / 0).
     conn.row_factory = sqlite3.Row
-    rows = conn.execute("""
-        WITH player_games AS (
-            SELECT white_username AS username, 'white' AS color,
-                   white_rating AS rating, accuracy_white AS accuracy,
-                   CASE WHEN result = '1-0' THEN 1 ELSE 0 END AS win,
-                   CASE WHEN result = '0-1' THEN 1 ELSE 0 END AS loss,
-                   CASE WHEN result = '1/2-1/2' THEN 1 ELSE 0 END AS draw,
-                   brilliant_white AS brilliant, great_white AS great, book_white AS book,
-                   best_white AS best, excellent_white AS excellent, good_white AS good,
-                   inaccuracy_white AS inaccuracy, mistake_white AS mistake,
-                   miss_white AS miss, blunder_white AS blunder
+    yield from conn.execute("""
+        WITH side_totals AS (
+            SELECT white_username AS username,
+                   COUNT(*) AS games,
+                   SUM(white_win) AS wins, SUM(black_win) AS losses, SUM(draw) AS draws,
+                   SUM(white_rating) AS rating_sum, COUNT(white_rating) AS rating_n,
+                   SUM(accuracy_white) AS accuracy_sum, COUNT(accuracy_white) AS accuracy_n,
+                   SUM(brilliant_white) AS brilliant, SUM(great_white) AS great,
+                   SUM(book_white) AS book, SUM(best_white) AS best,
+                   SUM(excellent_white) AS excellent, SUM(good_white) AS good,
+                   SUM(inaccuracy_white) AS inaccuracy, SUM(mistake_white) AS mistake,
+                   SUM(miss_white) AS miss, SUM(blunder_white) AS blunder
             FROM games
             WHERE white_username != ''
+            GROUP BY white_username
             UNION ALL
-            SELECT black_username, 'black',
-                   black_rating AS rating, accuracy_black AS accuracy,
-                   CASE WHEN result = '0-1' THEN 1 ELSE 0 END AS win,
-                   CASE WHEN result = '1-0' THEN 1 ELSE 0 END AS loss,
-                   CASE WHEN result = '1/2-1/2' THEN 1 ELSE 0 END AS draw,
-                   brilliant_black, great_black, book_black,
-                   best_black, excellent_black, good_black,
-                   inaccuracy_black, mistake_black, miss_black, blunder_black
+            SELECT black_username,
+                   COUNT(*),
+                   SUM(black_win), SUM(white_win), SUM(draw),
+                   SUM(black_rating), COUNT(black_rating),
+                   SUM(accuracy_black), COUNT(accuracy_black),
+                   SUM(brilliant_black), SUM(great_black),
+                   SUM(book_black), SUM(best_black),
+                   SUM(excellent_black), SUM(good_black),
+                   SUM(inaccuracy_black), SUM(mistake_black),
+                   SUM(miss_black), SUM(blunder_black)
             FROM games
             WHERE black_username != ''
+            GROUP BY black_username
         )
         SELECT
             username,
-            COUNT(*) AS games_played,
-            SUM(win) AS wins,
-            SUM(loss) AS losses,
-            SUM(draw) AS draws,
-            ROUND(AVG(rating), 1) AS avg_rating,
-            ROUND(AVG(accuracy), 1) AS avg_accuracy,
+            SUM(games) AS games_played,
+            SUM(wins) AS wins,
+            SUM(losses) AS losses,
+            SUM(draws) AS draws,
+            1.0 * SUM(rating_sum) / SUM(rating_n) AS avg_rating,
+            1.0 * SUM(accuracy_sum) / SUM(accuracy_n) AS avg_accuracy,
             SUM(brilliant) AS total_brilliant,
             SUM(great) AS total_great,
             SUM(book) AS total_book,
@@ -54,30 +63,34 @@ def get_player_stats(conn: sqlite3.Connection) -> list[dict]:
             SUM(mistake) AS total_mistake,
             SUM(miss) AS total_miss,
             SUM(blunder) AS total_blunder,
-            ROUND(1.0 * SUM(brilliant) / NULLIF(COUNT(*), 0), 2) AS avg_brilliant_per_game,
-            ROUND(1.0 * SUM(great) / NULLIF(COUNT(*), 0), 2) AS avg_great_per_game,
-            ROUND(1.0 * SUM(blunder) / NULLIF(COUNT(*), 0), 2) AS avg_blunder_per_game
-        FROM player_games
+            1.0 * SUM(brilliant) / SUM(games) AS avg_brilliant_per_game,
+            1.0 * SUM(great) / SUM(games) AS avg_great_per_game,
+            1.0 * SUM(blunder) / SUM(games) AS avg_blunder_per_game
+        FROM side_totals
         GROUP BY username
         ORDER BY total_brilliant DESC, games_played DESC
-    """).fetchall()
+    """)
+
+
+def as_dicts(rows: Iterable[sqlite3.Row]) -> list[dict]:
+    """Convert sqlite3.Row results to plain dicts (e.g. for JSON output)."""
     return [dict(r) for r in rows]
 
 
 def get_season_summary(conn: sqlite3.Connection) -> dict:
     """Get overall season summary."""
-    total_games = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0] or 0
+    # Game count and Brilliant total share a single pass over games
+    total_games, total_brilliant = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(brilliant_white + brilliant_black), 0) FROM games"
+    ).fetchone()
 
-    players = conn.execute("""
-        SELECT white_username AS username FROM games WHERE white_username != ''
-        UNION
-        SELECT black_username FROM games WHERE black_username != ''
-    """).fetchall()
-    unique_players = len(set(r[0] for r in players))
-
-    total_brilliant = conn.execute(
-        "SELECT COALESCE(SUM(brilliant_white + brilliant_black), 0) FROM games"
-    ).fetchone()[0]
+    unique_players = conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT white_username AS username FROM games WHERE white_username != ''
+            UNION
+            SELECT black_username FROM games WHERE black_username != ''
+        )
+    """).fetchone()[0]
 
     return {
         "total_games": total_games,
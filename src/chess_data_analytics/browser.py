@@ -1,10 +1,14 @@
 """Browser automation for Chess.com game review data extraction."""
 
+import asyncio
 import os
+import random
 import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import Page, async_playwright
 
 from .config import (
     COLLAPSE_EXPAND_DELAY,
@@ -12,6 +16,7 @@ from .config import (
     INITIAL_LOAD_DELAY,
     PAGE_LOAD_TIMEOUT,
     PGN_ANALYSIS_URL,
+    REVIEW_TALLIES_TIMEOUT,
     TALLIES_COLLAPSE_BUTTON,
     USER_DATA_DIR,
     VIEWPORT_HEIGHT,
@@ -20,43 +25,151 @@ from .config import (
 from .parser import parse_game_review_page
 
 
-def extract_game_review(
-    game_id: str,
-    headless: bool = False,
-    pgn: bool = False,
-) -> dict | None:
+class ReviewSession:
     """
-    Load a Chess.com game review page and extract parsed data.
-    Returns parsed game data dict, or None on failure.
-    If pgn=True, uses PGN analysis URL (for codes like jFY6SgYtW).
+    One Chromium persistent context reused across many game reviews.
+    Use as a context manager; the browser starts on enter and closes on exit.
+    Playwright's async API runs on a private event loop, so callers stay synchronous.
     """
-    url = (
-        PGN_ANALYSIS_URL.format(game_id=game_id)
-        if pgn
-        else GAME_REVIEW_URL.format(game_id=game_id)
-    )
-
-    with sync_playwright() as p:
-        context = p.chromium.launch_persistent_context(
-            user_data_dir=USER_DATA_DIR,
-            headless=headless,
-            viewport={"width": VIEWPORT_WIDTH, "height": VIEWPORT_HEIGHT},
-            args=["--disable-blink-features=AutomationControlled"],
+
+    def __init__(self, headless: bool = False) -> None:
+        self.headless = headless
+        self._loop = None
+        self._playwright = None
+        self._context = None
+        self._page = None
+        self._parse_pool = None
+
+    def __enter__(self) -> "ReviewSession":
+        self._loop = asyncio.new_event_loop()
+        # HTML parsing runs here so the event loop keeps driving other pages
+        self._parse_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="review-parse")
+        try:
+            self._loop.run_until_complete(self._start())
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the browser context and stop Playwright."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self._stop())
+        finally:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+            self._loop.close()
+            self._loop = None
+
+    def extract(self, game_id: str, pgn: bool = False) -> dict | None:
+        """
+        Load a Chess.com game review page in the shared page and extract parsed data.
+        Returns parsed game data dict, or None on failure.
+        If pgn=True, uses PGN analysis URL (for codes like jFY6SgYtW).
+        """
+        return self._loop.run_until_complete(self._extract(self._page, game_id, pgn))
+
+    def extract_many(
+        self,
+        game_ids: list[str],
+        concurrency: int = 4,
+        delay: float = 0.0,
+        on_result: Callable[[str, dict | None], None] | None = None,
+    ) -> list[dict | None]:
+        """
+        Extract several games concurrently, each in its own page of the shared context.
+        At most `concurrency` pages load at once; each waits a jittered `delay`
+        (seconds) before navigating to stay under Chess.com's rate limit.
+        `on_result(game_id, data)` is called as each game finishes.
+        Returns parsed data (or None on failure) in the same order as game_ids.
+        """
+        return self._loop.run_until_complete(
+            self._extract_many(game_ids, concurrency, delay, on_result)
         )
-        context.set_default_timeout(PAGE_LOAD_TIMEOUT)
-        page = context.pages[0] if context.pages else context.new_page()
 
+    async def _start(self) -> None:
+        self._playwright = await async_playwright().start()
         try:
-            page.goto(url, wait_until="domcontentloaded")
-            page.wait_for_load_state("networkidle", timeout=PAGE_LOAD_TIMEOUT)
+            self._context = await self._playwright.chromium.launch_persistent_context(
+                user_data_dir=USER_DATA_DIR,
+                headless=self.headless,
+                viewport={"width": VIEWPORT_WIDTH, "height": VIEWPORT_HEIGHT},
+                args=["--disable-blink-features=AutomationControlled"],
+            )
+        except Exception:
+            await self._playwright.stop()
+            self._playwright = None
+            raise
+        self._context.set_default_timeout(PAGE_LOAD_TIMEOUT)
+        self._page = (
+            self._context.pages[0] if self._context.pages else await self._context.new_page()
+        )
+
+    async def _stop(self) -> None:
+        if self._context is not None:
+            await self._context.close()
+            self._context = None
+            self._page = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _extract_many(
+        self,
+        game_ids: list[str],
+        concurrency: int,
+        delay: float,
+        on_result: Callable[[str, dict | None], None] | None,
+    ) -> list[dict | None]:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(game_id: str) -> dict | None:
+            async with semaphore:
+                if delay > 0:
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                page = None
+                try:
+                    # Inside the try: a page that fails to open (e.g. crashed context)
+                    # fails only this game, not the whole gather
+                    page = await self._context.new_page()
+                    data = await self._extract(page, game_id, pgn=False)
+                except Exception as e:
+                    print(f"Error extracting {game_id}: {e}", file=sys.stderr)
+                    data = None
+                finally:
+                    if page is not None:
+                        try:
+                            await page.close()
+                        except Exception:
+                            pass  # Already gone with the context
+            if on_result is not None:
+                on_result(game_id, data)
+            return data
+
+        return await asyncio.gather(*(run(game_id) for game_id in game_ids))
+
+    async def _extract(self, page: Page, game_id: str, pgn: bool) -> dict | None:
+        url = (
+            PGN_ANALYSIS_URL.format(game_id=game_id)
+            if pgn
+            else GAME_REVIEW_URL.format(game_id=game_id)
+        )
+
+        try:
+            # Chess.com keeps sockets open, so never wait for networkidle
+            await page.goto(url, wait_until="domcontentloaded")
         except Exception as e:
-            print(f"Error loading page: {e}", file=sys.stderr)
-            context.close()
+            print(f"Error loading page for {game_id}: {e}", file=sys.stderr)
             return None
 
         # Wait for board or main content
         try:
-            page.wait_for_selector(
+            await page.wait_for_selector(
                 "canvas, [class*='board'], [class*='chess']", timeout=INITIAL_LOAD_DELAY
             )
         except Exception:
@@ -68,21 +181,18 @@ def extract_game_review(
                 )
             else:
                 print(
-                    "Game review page did not load. Check the game ID and your connection.",
+                    f"Game review page did not load for {game_id}. "
+                    "Check the game ID and your connection.",
                     file=sys.stderr,
                 )
-            context.close()
             return None
 
-        # Wait for Chess.com to finish game review computation
-        page.wait_for_timeout(INITIAL_LOAD_DELAY)
-
-        # Wait for tallies to appear (game review complete)
+        # Tallies appear once Chess.com finishes the review computation
         try:
-            page.wait_for_selector(
+            await page.wait_for_selector(
                 "[data-cy='game-review-tallies-number-Brilliant-white'], "
                 "[data-cy='game-review-tallies-number-BestMove-white']",
-                timeout=PAGE_LOAD_TIMEOUT,
+                timeout=REVIEW_TALLIES_TIMEOUT,
             )
         except Exception:
             print(
@@ -90,23 +200,36 @@ def extract_game_review(
                 "The game may not be reviewable.",
                 file=sys.stderr,
             )
-            context.close()
             return None
 
         # Expand tallies if collapsed (chevron-down = collapsed, chevron-up = expanded)
         collapse_locator = page.locator(TALLIES_COLLAPSE_BUTTON)
-        if collapse_locator.count() > 0:
+        if await collapse_locator.count() > 0:
             try:
                 btn = collapse_locator.first
-                if "chevron-down" in (btn.get_attribute("class") or ""):
-                    btn.click()
-                    page.wait_for_timeout(COLLAPSE_EXPAND_DELAY)
+                if "chevron-down" in (await btn.get_attribute("class") or ""):
+                    await btn.click()
+                    await page.wait_for_timeout(COLLAPSE_EXPAND_DELAY)
             except Exception:
                 pass  # Non-fatal; proceed with parse
 
-        # Parse the page
-        html = page.content()
-        context.close()
+        # Parse the page off the event loop, overlapping other pages' navigation
+        html = await page.content()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._parse_pool, parse_game_review_page, html, game_id
+        )
+
 
-    data = parse_game_review_page(html, game_id)
-    return data
+def extract_game_review(
+    game_id: str,
+    headless: bool = False,
+    pgn: bool = False,
+) -> dict | None:
+    """
+    Load a single Chess.com game review page and extract parsed data.
+    Returns parsed game data dict, or None on failure.
+    If pgn=True, uses PGN analysis URL (for codes like jFY6SgYtW).
+    For many games, use ReviewSession to keep one browser open.
+    """
+    with ReviewSession(headless=headless) as session:
+        return session.extract(game_id, pgn=pgn)
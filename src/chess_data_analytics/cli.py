@@ -3,20 +3,32 @@
 import argparse
 import csv
 import re
+import sqlite3
 import sys
-import time
+from collections.abc import Iterator
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
 from pathlib import Path
 
-from .browser import extract_game_review
-from .database import get_connection, insert_game
+from .browser import ReviewSession, extract_game_review
+from .database import (
+    existing_game_ids,
+    get_connection,
+    get_readonly_connection,
+    insert_game,
+    insert_games,
+)
 from .analytics import get_player_stats, get_season_summary
-from .config import DEFAULT_DB_PATH
+from .config import COLLECT_CONCURRENCY, DEFAULT_DB_PATH, INSERT_BATCH_SIZE
 from .parser import parse_pgn_text, parse_game_review_page
 
 
+_GAME_ID_RE = re.compile(r"(?:game/live|analysis/game/live)/(\d+)")
+
+
 def extract_game_id(value: str) -> str | None:
     """Extract game ID from URL or return as-is if already numeric."""
-    match = re.search(r"(?:game/live|analysis/game/live)/(\d+)", value)
+    match = _GAME_ID_RE.search(value)
     if match:
         return match.group(1)
     if value.isdigit():
@@ -24,46 +36,82 @@ def extract_game_id(value: str) -> str | None:
     return None
 
 
-def load_game_ids_from_csv(path: str) -> list[str]:
-    """Load game IDs from CSV. Expects a column named 'game_id' or first column."""
-    ids = []
+def load_game_ids_from_csv(path: str) -> Iterator[str]:
+    """Yield game IDs from CSV. Expects a column named 'game_id' or first column."""
     with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        if not reader.fieldnames:
-            return ids
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
         # Try game_id column first, else use first column
-        col = "game_id" if "game_id" in reader.fieldnames else reader.fieldnames[0]
+        col = header.index("game_id") if "game_id" in header else 0
         for row in reader:
-            val = row.get(col, "").strip()
+            val = row[col].strip() if col < len(row) else ""
             gid = extract_game_id(val) if val else None
             if gid:
-                ids.append(gid)
-    return ids
+                yield gid
+
+
+def count_game_ids(path: str) -> int:
+    """Count valid game IDs in CSV without keeping them in memory."""
+    return sum(1 for _ in load_game_ids_from_csv(path))
 
 
 def cmd_collect(args: argparse.Namespace) -> int:
     """Collect game data from CSV and store in database."""
-    game_ids = load_game_ids_from_csv(args.csv_file)
-    if not game_ids:
+    total = count_game_ids(args.csv_file)
+    if not total:
         print("No valid game IDs found in CSV.", file=sys.stderr)
         return 1
 
-    print(f"Found {len(game_ids)} game(s) to process.")
+    print(f"Found {total} game(s) to process.")
     conn = get_connection(args.db)
 
-    for i, game_id in enumerate(game_ids, 1):
-        print(f"[{i}/{len(game_ids)}] Processing game {game_id}...")
-        data = extract_game_review(game_id, headless=args.headless)
-        if data:
-            insert_game(conn, data)
+    pending: list[dict] = []
+
+    def flush() -> None:
+        if pending:
+            insert_games(conn, pending)
             conn.commit()
-            print(f"  Saved: {data.get('white_username', '?')} vs {data.get('black_username', '?')}")
+            print(f"  Saved {len(pending)} game(s) to database.")
+            pending.clear()
+
+    done = 0
+
+    def on_result(game_id: str, data: dict | None) -> None:
+        nonlocal done
+        done += 1
+        if data:
+            pending.append(data)
+            print(
+                f"[{done}/{total}] {game_id}: "
+                f"{data.get('white_username', '?')} vs {data.get('black_username', '?')}"
+            )
         else:
-            print(f"  Failed to extract data.", file=sys.stderr)
+            print(f"[{done}/{total}] {game_id}: failed to extract data.", file=sys.stderr)
 
-        # Delay between games to avoid rate limits
-        if i < len(game_ids):
-            time.sleep(args.move_delay)
+    # Stream IDs from the CSV one batch at a time; each batch is one commit
+    game_ids = load_game_ids_from_csv(args.csv_file)
+    try:
+        with ReviewSession(headless=args.headless) as session:
+            while batch := list(islice(game_ids, INSERT_BATCH_SIZE)):
+                if not args.force:
+                    # Review data is fixed per game, so skip games already collected
+                    known = existing_game_ids(conn, batch)
+                    if known:
+                        done += len(known)
+                        print(f"[{done}/{total}] Skipped {len(known)} game(s) already in database.")
+                        batch = [gid for gid in batch if gid not in known]
+                session.extract_many(
+                    batch,
+                    concurrency=args.concurrency,
+                    delay=args.move_delay,
+                    on_result=on_result,
+                )
+                flush()
+    finally:
+        # Keep already-scraped games even if the run is interrupted
+        flush()
 
     conn.close()
     print("Done.")
@@ -76,31 +124,50 @@ def cmd_players(args: argparse.Namespace) -> int:
         print(f"Database not found: {args.db}. Run 'collect' first.", file=sys.stderr)
         return 1
 
-    conn = get_connection(args.db)
-    stats = get_player_stats(conn)
-    conn.close()
-
-    if not stats:
+    conn = get_readonly_connection(args.db)
+    printed_any = False
+    try:
+        # Rows are printed as the cursor yields them, without buffering a list
+        for s in get_player_stats(conn):
+            if not printed_any:
+                print("\n=== Player Summaries ===\n")
+                printed_any = True
+            _print_player(s)
+    finally:
+        conn.close()
+
+    if not printed_any:
         print("No player data yet. Run 'collect' first.")
-        return 0
-
-    print("\n=== Player Summaries ===\n")
-    for s in stats:
-        print(f"  {s['username']}")
-        acc = s.get("avg_accuracy")
-        acc_str = f"{acc}%" if acc is not None and acc > 0 else "—"
-        wld = f"W: {s.get('wins', 0)}  L: {s.get('losses', 0)}  D: {s.get('draws', 0)}"
-        print(f"    Games: {s['games_played']}  ({wld})  |  Avg Rating: {s['avg_rating']}  |  Avg Accuracy: {acc_str}")
-        print(f"    Brilliant: {s['total_brilliant']}  Great: {s['total_great']}  "
-              f"Best: {s['total_best']}  Book: {s['total_book']}")
-        print(f"    Excellent: {s['total_excellent']}  Good: {s['total_good']}")
-        print(f"    Inaccuracies: {s['total_inaccuracy']}  Mistakes: {s['total_mistake']}  "
-              f"Miss: {s['total_miss']}  Blunders: {s['total_blunder']}")
-        print()
-
     return 0
 
 
+def _round_1dp(value: float | None) -> Decimal | None:
+    """
+    Round to one decimal place, half away from zero, like SQLite's ROUND(x, 1).
+    Goes through repr() so e.g. 81.25 and 0.15 round up as their printed digits suggest.
+    """
+    if value is None:
+        return None
+    return Decimal(repr(value)).quantize(Decimal("0.1"), ROUND_HALF_UP)
+
+
+def _print_player(s: sqlite3.Row) -> None:
+    """Print one player summary row."""
+    print(f"  {s['username']}")
+    acc = _round_1dp(s["avg_accuracy"])
+    acc_str = f"{acc}%" if acc is not None and acc > 0 else "—"
+    rating = _round_1dp(s["avg_rating"])
+    rating_str = f"{rating}" if rating is not None else "—"
+    wld = f"W: {s['wins']}  L: {s['losses']}  D: {s['draws']}"
+    print(f"    Games: {s['games_played']}  ({wld})  |  Avg Rating: {rating_str}  |  Avg Accuracy: {acc_str}")
+    print(f"    Brilliant: {s['total_brilliant']}  Great: {s['total_great']}  "
+          f"Best: {s['total_best']}  Book: {s['total_book']}")
+    print(f"    Excellent: {s['total_excellent']}  Good: {s['total_good']}")
+    print(f"    Inaccuracies: {s['total_inaccuracy']}  Mistakes: {s['total_mistake']}  "
+          f"Miss: {s['total_miss']}  Blunders: {s['total_blunder']}")
+    print()
+
+
 def cmd_manual_pgn(args: argparse.Namespace) -> int:
     """Add a manually entered PGN (e.g. OTB league game) to the database."""
     if args.html_file:
@@ -220,7 +287,7 @@ def cmd_summary(args: argparse.Namespace) -> int:
         print(f"Database not found: {args.db}. Run 'collect' first.", file=sys.stderr)
         return 1
 
-    conn = get_connection(args.db)
+    conn = get_readonly_connection(args.db)
     s = get_season_summary(conn)
     conn.close()
 
@@ -260,6 +327,17 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         default=1.5,
         help="Delay between games in seconds (default: 1.5)",
     )
+    collect.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-collect games that are already in the database",
+    )
+    collect.add_argument(
+        "--concurrency",
+        type=int,
+        default=COLLECT_CONCURRENCY,
+        help=f"Game reviews loaded in parallel (default: {COLLECT_CONCURRENCY})",
+    )
     collect.set_defaults(func=cmd_collect)
 
     sub.add_parser("players", help="Show player summaries").set_defaults(func=cmd_players)
@@ -7,8 +7,15 @@ USER_DATA_DIR = os.path.join(os.getcwd(), ".chess_browser_data")
 DEFAULT_DB_PATH = os.path.join(os.getcwd(), "chess_analytics.db")
 
 # Timeouts (ms)
-INITIAL_LOAD_DELAY = 10000  # Chess.com computation when loading game review (~10s)
+INITIAL_LOAD_DELAY = 10000  # Max wait for the review board to render (and to log in)
 PAGE_LOAD_TIMEOUT = 15000
+REVIEW_TALLIES_TIMEOUT = 20000  # Max wait for Chess.com to finish the review computation
+
+# Games buffered per executemany/commit during collect
+INSERT_BATCH_SIZE = 50
+
+# Game review pages loaded in parallel during collect
+COLLECT_CONCURRENCY = 4
 
 # Viewport
 VIEWPORT_WIDTH = 1280
@@ -24,7 +31,7 @@ PLAYER_BOTTOM_SELECTOR = "[data-cy='analysis-player-Bottom']"
 USERNAME_SELECTOR = "[data-test-element='user-tagline-username']"
 
 # Move tally types (Chess.com data-cy values)
-TALLY_TYPES = [
+TALLY_TYPES = (
     "Brilliant",
     "GreatFind",  # "Great"
     "Book",
@@ -35,4 +42,4 @@ TALLY_TYPES = [
     "Mistake",
     "Miss",
     "Blunder",
-]
+)
@@ -3,18 +3,101 @@
 import sqlite3
 from pathlib import Path
 
+# Stored in PRAGMA user_version once _init_schema has run; bump it whenever
+# the schema, indices or migrations change so existing databases re-run them.
+SCHEMA_VERSION = 2
+
+# (games column, parsed-data key, default) for every column written on insert
+_INSERT_FIELDS = (
+    ("game_id", "game_id", ""),
+    ("white_username", "white_username", ""),
+    ("black_username", "black_username", ""),
+    ("white_rating", "white_rating", 0),
+    ("black_rating", "black_rating", 0),
+    ("brilliant_white", "Brilliant_white", 0),
+    ("brilliant_black", "Brilliant_black", 0),
+    ("great_white", "GreatFind_white", 0),
+    ("great_black", "GreatFind_black", 0),
+    ("book_white", "Book_white", 0),
+    ("book_black", "Book_black", 0),
+    ("best_white", "BestMove_white", 0),
+    ("best_black", "BestMove_black", 0),
+    ("excellent_white", "Excellent_white", 0),
+    ("excellent_black", "Excellent_black", 0),
+    ("good_white", "Good_white", 0),
+    ("good_black", "Good_black", 0),
+    ("inaccuracy_white", "Inaccuracy_white", 0),
+    ("inaccuracy_black", "Inaccuracy_black", 0),
+    ("mistake_white", "Mistake_white", 0),
+    ("mistake_black", "Mistake_black", 0),
+    ("miss_white", "Miss_white", 0),
+    ("miss_black", "Miss_black", 0),
+    ("blunder_white", "Blunder_white", 0),
+    ("blunder_black", "Blunder_black", 0),
+    ("accuracy_white", "white_accuracy", 0.0),
+    ("accuracy_black", "black_accuracy", 0.0),
+    ("result", "result", ""),
+)
+# Derived from result at insert time so aggregation just SUMs them
+_RESULT_FLAG_COLUMNS = ("white_win", "black_win", "draw")
+_INSERT_COLUMNS = tuple(f[0] for f in _INSERT_FIELDS) + _RESULT_FLAG_COLUMNS
+_INSERT_KEYS = tuple(f[1] for f in _INSERT_FIELDS)
+_INSERT_DEFAULTS = tuple(f[2] for f in _INSERT_FIELDS)
+_UPDATE_COLUMNS = tuple(c for c in _INSERT_COLUMNS if c != "game_id")
+# Built once so sqlite3's statement cache reuses the prepared plan.
+# Upsert rather than REPLACE: keeps created_at, and rows whose values are
+# unchanged on a re-collect are not rewritten at all.
+_INSERT_SQL = (
+    f"INSERT INTO games ({', '.join(_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_INSERT_COLUMNS))}) "
+    f"ON CONFLICT(game_id) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in _UPDATE_COLUMNS)} "
+    f"WHERE {' OR '.join(f'games.{c} IS NOT excluded.{c}' for c in _UPDATE_COLUMNS)}"
+)
+
 
 def get_connection(db_path: str) -> sqlite3.Connection:
     """Get a connection to the analytics database, creating schema if needed."""
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    _configure_connection(conn)
     _init_schema(conn)
     return conn
 
 
+def get_readonly_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Get a read-only connection for analytics queries, skipping schema setup.
+    Falls back to get_connection if the database still needs migrating.
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=256)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.close()
+        return get_connection(db_path)
+    conn.row_factory = sqlite3.Row
+    _configure_connection(conn, readonly=True)
+    return conn
+
+
+def _configure_connection(conn: sqlite3.Connection, readonly: bool = False) -> None:
+    """Apply per-connection PRAGMAs tuned for a single-writer analytics DB."""
+    if not readonly:
+        # journal_mode is stored in the database file, so only switch it once
+        if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+            conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL sync: one fsync per checkpoint instead of per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")  # GROUP BY / ORDER BY temp B-trees
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB memory-mapped reads
+
+
 def _init_schema(conn: sqlite3.Connection) -> None:
-    """Create tables if they don't exist."""
+    """Create tables and run migrations, unless user_version says it's already done."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS games (
             game_id TEXT PRIMARY KEY,
@@ -45,22 +128,50 @@ def _init_schema(conn: sqlite3.Connection) -> None:
             accuracy_white REAL DEFAULT 0,
             accuracy_black REAL DEFAULT 0,
             result TEXT DEFAULT '',
+            white_win INTEGER DEFAULT 0,
+            black_win INTEGER DEFAULT 0,
+            draw INTEGER DEFAULT 0,
             created_at TEXT DEFAULT (datetime('now'))
         );
-
-        CREATE INDEX IF NOT EXISTS idx_games_white ON games(white_username);
-        CREATE INDEX IF NOT EXISTS idx_games_black ON games(black_username);
     """)
-    _migrate_drop_player_ids(conn)
-    _migrate_add_accuracy(conn)
-    _migrate_add_result(conn)
+    # One catalog read shared by every migration; each touches disjoint columns
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(games)")}
+    _migrate_drop_player_ids(conn, cols)
+    _migrate_add_accuracy(conn, cols)
+    _migrate_add_result(conn, cols)
+    _migrate_add_result_flags(conn, cols)
+    # Indices come after migrations: they reference columns older DBs lack
+    conn.executescript("""
+        -- Covering indices for per-player aggregation: every column that
+        -- get_player_stats reads for a color, so it never touches the table.
+        -- Partial on non-empty usernames, matching the queries' WHERE clause,
+        -- so rows without a player are never stored or scanned. Dropped and
+        -- rebuilt on each SCHEMA_VERSION bump so definition changes apply.
+        DROP INDEX IF EXISTS idx_games_white_stats;
+        DROP INDEX IF EXISTS idx_games_black_stats;
+        CREATE INDEX idx_games_white_stats ON games(
+            white_username, white_rating, accuracy_white, white_win, black_win, draw,
+            brilliant_white, great_white, book_white, best_white, excellent_white,
+            good_white, inaccuracy_white, mistake_white, miss_white, blunder_white
+        ) WHERE white_username != '';
+        CREATE INDEX idx_games_black_stats ON games(
+            black_username, black_rating, accuracy_black, white_win, black_win, draw,
+            brilliant_black, great_black, book_black, best_black, excellent_black,
+            good_black, inaccuracy_black, mistake_black, miss_black, blunder_black
+        ) WHERE black_username != '';
+        -- Superseded by the indices above (same leading column)
+        DROP INDEX IF EXISTS idx_games_white;
+        DROP INDEX IF EXISTS idx_games_black;
+        DROP INDEX IF EXISTS idx_games_white_cover;
+        DROP INDEX IF EXISTS idx_games_black_cover;
+    """)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
 
 
-def _migrate_drop_player_ids(conn: sqlite3.Connection) -> None:
+def _migrate_drop_player_ids(conn: sqlite3.Connection, cols: set[str]) -> None:
     """Drop white_id and black_id columns from existing databases (SQLite 3.35+)."""
     try:
-        info = conn.execute("PRAGMA table_info(games)").fetchall()
-        cols = [r[1] for r in info]
         if "white_id" in cols:
             conn.execute("ALTER TABLE games DROP COLUMN white_id")
         if "black_id" in cols:
@@ -69,11 +180,9 @@ def _migrate_drop_player_ids(conn: sqlite3.Connection) -> None:
         pass  # Older SQLite or column already dropped
 
 
-def _migrate_add_accuracy(conn: sqlite3.Connection) -> None:
+def _migrate_add_accuracy(conn: sqlite3.Connection, cols: set[str]) -> None:
     """Add accuracy_white and accuracy_black columns if missing."""
     try:
-        info = conn.execute("PRAGMA table_info(games)").fetchall()
-        cols = [r[1] for r in info]
         if "accuracy_white" not in cols:
             conn.execute("ALTER TABLE games ADD COLUMN accuracy_white REAL DEFAULT 0")
         if "accuracy_black" not in cols:
@@ -82,66 +191,65 @@ def _migrate_add_accuracy(conn: sqlite3.Connection) -> None:
         pass
 
 
-def _migrate_add_result(conn: sqlite3.Connection) -> None:
+def _migrate_add_result(conn: sqlite3.Connection, cols: set[str]) -> None:
     """Add result column if missing."""
     try:
-        info = conn.execute("PRAGMA table_info(games)").fetchall()
-        cols = [r[1] for r in info]
         if "result" not in cols:
             conn.execute("ALTER TABLE games ADD COLUMN result TEXT DEFAULT ''")
     except sqlite3.OperationalError:
         pass
 
 
+def _migrate_add_result_flags(conn: sqlite3.Connection, cols: set[str]) -> None:
+    """Add precomputed white_win/black_win/draw columns if missing, backfilled from result."""
+    # One transaction for the ALTERs and the backfill: if the run dies in between,
+    # the columns roll back too and the next run adds and backfills them again.
+    try:
+        conn.execute("BEGIN")
+        added = False
+        for col in _RESULT_FLAG_COLUMNS:
+            if col not in cols:
+                conn.execute(f"ALTER TABLE games ADD COLUMN {col} INTEGER DEFAULT 0")
+                added = True
+        if added:
+            conn.execute("""
+                UPDATE games SET
+                    white_win = (IFNULL(result, '') = '1-0'),
+                    black_win = (IFNULL(result, '') = '0-1'),
+                    draw = (IFNULL(result, '') = '1/2-1/2')
+            """)
+        conn.commit()
+    except sqlite3.OperationalError:
+        conn.rollback()
+
+
+def existing_game_ids(conn: sqlite3.Connection, game_ids: list[str]) -> set[str]:
+    """Return the subset of game_ids that already have a row in games."""
+    if not game_ids:
+        return set()
+    placeholders = ", ".join("?" * len(game_ids))
+    rows = conn.execute(
+        f"SELECT game_id FROM games WHERE game_id IN ({placeholders})", game_ids
+    )
+    return {r[0] for r in rows}
+
+
 def insert_game(conn: sqlite3.Connection, data: dict) -> None:
-    """Insert or replace a game record."""
-    columns = [
-        "game_id", "white_username", "black_username",
-        "white_rating", "black_rating",
-        "brilliant_white", "brilliant_black",
-        "great_white", "great_black",
-        "book_white", "book_black",
-        "best_white", "best_black",
-        "excellent_white", "excellent_black",
-        "good_white", "good_black",
-        "inaccuracy_white", "inaccuracy_black",
-        "mistake_white", "mistake_black",
-        "miss_white", "miss_black",
-        "blunder_white", "blunder_black",
-        "accuracy_white", "accuracy_black",
-        "result",
-    ]
-    placeholders = ", ".join("?" * len(columns))
-    conn.execute(
-        f"INSERT OR REPLACE INTO games ({', '.join(columns)}) VALUES ({placeholders})",
-        [
-            data.get("game_id", ""),
-            data.get("white_username", ""),
-            data.get("black_username", ""),
-            data.get("white_rating", 0),
-            data.get("black_rating", 0),
-            data.get("Brilliant_white", 0),
-            data.get("Brilliant_black", 0),
-            data.get("GreatFind_white", 0),
-            data.get("GreatFind_black", 0),
-            data.get("Book_white", 0),
-            data.get("Book_black", 0),
-            data.get("BestMove_white", 0),
-            data.get("BestMove_black", 0),
-            data.get("Excellent_white", 0),
-            data.get("Excellent_black", 0),
-            data.get("Good_white", 0),
-            data.get("Good_black", 0),
-            data.get("Inaccuracy_white", 0),
-            data.get("Inaccuracy_black", 0),
-            data.get("Mistake_white", 0),
-            data.get("Mistake_black", 0),
-            data.get("Miss_white", 0),
-            data.get("Miss_black", 0),
-            data.get("Blunder_white", 0),
-            data.get("Blunder_black", 0),
-            data.get("white_accuracy", 0.0),
-            data.get("black_accuracy", 0.0),
-            data.get("result", ""),
-        ],
+    """Insert a game record, or update it if the game_id already exists."""
+    conn.execute(_INSERT_SQL, _game_row(data))
+
+
+def insert_games(conn: sqlite3.Connection, games: list[dict]) -> None:
+    """Insert or update many game records in one executemany call."""
+    conn.executemany(_INSERT_SQL, [_game_row(data) for data in games])
+
+
+def _game_row(data: dict) -> tuple:
+    """Build the parameter tuple for one games row from parsed game data."""
+    result = data.get("result", "")
+    return (
+        *map(data.get, _INSERT_KEYS, _INSERT_DEFAULTS),
+        int(result == "1-0"),
+        int(result == "0-1"),
+        int(result == "1/2-1/2"),
     )
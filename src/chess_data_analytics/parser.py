@@ -1,7 +1,75 @@
 """Parse Chess.com game review HTML to extract player and move data."""
+import hashlib
 import re
+import threading
+from codecs import escape_decode
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from .config import TALLY_TYPES
+
+try:
+    import orjson as _json  # optional: faster drop-in for json.loads
+except ImportError:
+    import json as _json
+
+_VALID_RESULTS = frozenset(("1-0", "0-1", "1/2-1/2", "*"))
+
+_RE_RESULT = re.compile(r'\[Result\s+"([^"]+)"\]')
+_RE_PGN_HEADERS = re.compile(r'\[(Result|WhiteElo|BlackElo)\s+"([^"]+)"\]')
+# Single-quoted JS string, escapes included; unrolled so it runs without backtracking
+_RE_PGN_BLOB = re.compile(r"pgn:\s*'([^'\\]*(?:\\.[^'\\]*)*)'", re.DOTALL)
+_RE_USER_DETAILS = re.compile(r'userDetails:\s*JSON\.parse\s*\(\s*"(.+?)"\s*\)', re.DOTALL)
+_RE_TRAILING_INT = re.compile(r"-(\d+)$")  # e.g. review-rating-1300 -> 1300
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate equivalent to the CSS class selector .name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once at import; each call is a C-level walk of the lxml tree
+_XP_DATA_CY = etree.XPath("//*[@data-cy]")
+_XP_OVERVIEW_ROWS = etree.XPath(f"//*[{_has_class('game-overview-row')}]")
+_XP_USERNAME = etree.XPath(".//*[@data-test-element='user-tagline-username']")
+_XP_ROW_TITLE = etree.XPath(f".//*[{_has_class('game-overview-row-title')}]")
+_XP_ROW_ITEMS = etree.XPath(f".//*[{_has_class('game-overview-row-item')}]")
+_XP_SPAN = etree.XPath(".//span")
+_XP_RATING_SPAN = {
+    color: etree.XPath(f".//*[{_has_class(f'review-rating-{color}')}]//span")
+    for color in ("white", "black")
+}
+_XP_ACCURACY_SPAN = {
+    color: etree.XPath(
+        f".//*[{_has_class(f'review-accuracy-{color}')}"
+        f" or contains(@data-cy, 'accuracy-{color}')]//span"
+    )
+    for color in ("white", "black")
+}
+
+# (output key, data-cy value) per tally and color, e.g. "Book_white" and
+# "game-review-tallies-number-Book-white"; built once instead of per parse
+_TALLY_FIELDS = tuple(
+    (f"{t}_{color}", f"game-review-tallies-number-{t}-{color}")
+    for t in TALLY_TYPES
+    for color in ("white", "black")
+)
+_FAST_TALLY_KEYS = frozenset(key for key, _ in _TALLY_FIELDS)
+
+# Fast-path patterns for the fixed-shape review fields (see _scan_review_fields)
+# Matches every tally element; group 3 is None unless it holds just a number
+_RE_FAST_TALLY = re.compile(
+    r'data-cy="game-review-tallies-number-(\w+)-(white|black)"[^>]*>(?:\s*(\d+)\s*<)?'
+)
+_RE_FAST_RATING = re.compile(r'class="([^"]*)"\s+data-cy="review-rating-(\d+)"')
+_RE_FAST_ACCURACY_ROW = re.compile(
+    r'class="game-overview-row-title">(?:<!---->)?\s*Accuracy\s*</span>\s*'
+    r'<div class="game-overview-row-item">(?:\s|<[^>]*>)*?(\d+(?:\.\d+)?)\s*'
+    r'(?:\s|<[^>]*>)*?<div class="game-overview-row-item">(?:\s|<[^>]*>)*?(\d+(?:\.\d+)?)\s*<'
+)
 
 
 def _safe_int(text: str | None) -> int:
@@ -35,28 +103,33 @@ def parse_pgn_text(pgn: str) -> dict:
     Parse raw PGN text to extract result and optional ratings.
     Returns dict with keys: result, white_rating, black_rating (0 if not in PGN).
     """
+    # One pass over the headers; stop as soon as all three are seen
+    headers = {}
+    for m in _RE_PGN_HEADERS.finditer(pgn):
+        name, value = m.group(1), m.group(2)
+        if name != "Result" and not value.isdecimal():
+            continue  # Elo must be numeric (e.g. skip "?")
+        headers.setdefault(name, value)
+        if len(headers) == 3:
+            break
+
     result = ""
-    result_match = re.search(r'\[Result\s+"([^"]+)"\]', pgn)
-    if result_match:
-        r = result_match.group(1).strip().replace("\\/", "/")
-        if r in ("1-0", "0-1", "1/2-1/2", "*"):
+    if "Result" in headers:
+        r = headers["Result"].strip().replace("\\/", "/")
+        if r in _VALID_RESULTS:
             result = r
 
-    white_rating = 0
-    black_rating = 0
-    w_match = re.search(r'\[WhiteElo\s+"(\d+)"\]', pgn)
-    if w_match:
-        white_rating = _safe_int(w_match.group(1))
-    b_match = re.search(r'\[BlackElo\s+"(\d+)"\]', pgn)
-    if b_match:
-        black_rating = _safe_int(b_match.group(1))
+    white_rating = _safe_int(headers.get("WhiteElo"))
+    black_rating = _safe_int(headers.get("BlackElo"))
 
     return {"result": result, "white_rating": white_rating, "black_rating": black_rating}
 
 
 def _extract_pgn_result(html: str) -> str:
     """Extract game result from PGN in window.chesscom.analysis.pgn. Returns '1-0', '0-1', '1/2-1/2', or ''."""
-    match = re.search(r"pgn:\s*'(.+?)',", html, re.DOTALL)
+    if "pgn:" not in html:
+        return ""  # cheap substring test before the DOTALL scan
+    match = _RE_PGN_BLOB.search(html)
     if not match:
         return ""
     try:
@@ -64,35 +137,132 @@ def _extract_pgn_result(html: str) -> str:
         pgn = pgn_raw.encode().decode("unicode_escape")
     except Exception:
         return ""
-    result_match = re.search(r'\[Result\s+"([^"]+)"\]', pgn)
+    result_match = _RE_RESULT.search(pgn)
     if not result_match:
         return ""
     result = result_match.group(1).strip().replace("\\/", "/")  # normalize \/ from JSON
-    if result in ("1-0", "0-1", "1/2-1/2", "*"):
+    if result in _VALID_RESULTS:
         return result
     return ""
 
 
 def _extract_user_details(html: str) -> dict:
-    """Extract userDetails JSON from window.chesscom.analysis."""
+    """
+    Extract userDetails JSON from window.chesscom.analysis.
+    Always returns {"white": dict, "black": dict}; a side is {} when missing or malformed.
+    """
+    white, black = {}, {}
     # Match userDetails: JSON.parse("...")
-    match = re.search(
-        r'userDetails:\s*JSON\.parse\s*\(\s*"(.+?)"\s*\)',
-        html,
-        re.DOTALL,
-    )
-    if not match:
-        return {}
-    # Unescape the JSON string
-    escaped = match.group(1)
-    # Unescape common JSON escapes
-    unescaped = escaped.encode().decode("unicode_escape")
+    match = _RE_USER_DETAILS.search(html) if "userDetails:" in html else None
+    if match:
+        # Unescape the JS string literal (\" and \\); \uXXXX is left for the JSON decoder
+        escaped = match.group(1).replace("\\/", "/")
+        unescaped = escape_decode(escaped)[0].decode("utf-8", errors="replace")
+        try:
+            data = _json.loads(unescaped)
+        except Exception:
+            data = None
+        if isinstance(data, dict):
+            white = data.get("white") if isinstance(data.get("white"), dict) else {}
+            black = data.get("black") if isinstance(data.get("black"), dict) else {}
+    return {"white": white, "black": black}
+
+
+def _scan_review_fields(html: str) -> dict:
+    """
+    Regex scan of the raw HTML for tallies, game ratings and accuracy.
+    Returns only the fields it found, keyed like parse_game_review_page's output;
+    anything missing (e.g. unusual markup) is left for the DOM parse.
+    """
+    found = {}
+    # The DOM reads the first element per data-cy. Leave a tally to the DOM when
+    # its element holds more than a number, or when the key appears twice.
+    seen = set()
+    for m in _RE_FAST_TALLY.finditer(html):
+        key = f"{m.group(1)}_{m.group(2)}"
+        if key in seen:
+            found.pop(key, None)
+            continue
+        seen.add(key)
+        if m.group(3) is not None:
+            found[key] = int(m.group(3))
+    # Last match per color wins, as in the DOM data-cy loop
+    for m in _RE_FAST_RATING.finditer(html):
+        classes = m.group(1).split()
+        if "review-rating-white" in classes:
+            found["white_rating"] = int(m.group(2))
+        elif "review-rating-black" in classes:
+            found["black_rating"] = int(m.group(2))
+    m = _RE_FAST_ACCURACY_ROW.search(html)
+    if m:
+        white_accuracy, black_accuracy = float(m.group(1)), float(m.group(2))
+        if white_accuracy or black_accuracy:
+            found["white_accuracy"] = white_accuracy
+            found["black_accuracy"] = black_accuracy
+    return found
+
+
+def _data_cy_accuracy(el: etree._Element, data_cy: str) -> float:
+    """Accuracy from a data-cy element's span, else its trailing number in tenths (-815 -> 81.5)."""
+    val = _safe_float(_text(_first(_XP_SPAN, el)))
+    if val == 0:
+        m = _RE_TRAILING_INT.search(data_cy)
+        if m:
+            val = int(m.group(1)) / 10.0
+    return val
+
+
+def _fast_path(
+    html: str, game_id: str, fast: dict, white_details: dict, black_details: dict
+) -> dict | None:
+    """
+    Build the parse_game_review_page result from the regex scan and userDetails alone.
+    Returns None when anything the DOM fallbacks would look up is missing.
+    """
+    white_username = white_details.get("username")
+    black_username = black_details.get("username")
+    if not (white_username and black_username):
+        return None
+    if not (fast.get("white_rating") and fast.get("black_rating")):
+        return None
+    if "white_accuracy" not in fast or not _FAST_TALLY_KEYS.issubset(fast):
+        return None
+    return {
+        "game_id": game_id,
+        "white_username": white_username,
+        "black_username": black_username,
+        "white_rating": fast["white_rating"],
+        "black_rating": fast["black_rating"],
+        "white_accuracy": fast["white_accuracy"],
+        "black_accuracy": fast["black_accuracy"],
+        "result": _extract_pgn_result(html),
+        **{key: fast[key] for key, _ in _TALLY_FIELDS},
+    }
+
+
+def _parse_tree(html: str) -> etree._Element:
+    """Parse HTML with lxml; an empty or unparseable page yields an empty <html> element."""
     try:
-        import json
+        return lxml_html.fromstring(html)
+    except ValueError:
+        # lxml rejects str input carrying an encoding declaration (<?xml ... encoding=...?>)
+        try:
+            return lxml_html.fromstring(html.encode("utf-8"))
+        except (etree.ParserError, ValueError):
+            return lxml_html.Element("html")
+    except etree.ParserError:
+        return lxml_html.Element("html")
 
-        return json.loads(unescaped)
-    except Exception:
-        return {}
+
+def _first(xpath: etree.XPath, el: etree._Element) -> etree._Element | None:
+    """First node matched by a compiled XPath, or None."""
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def _text(el: etree._Element | None) -> str | None:
+    """Text content of el (comments excluded), or None when el is None."""
+    return el.text_content() if el is not None else None
 
 
 def parse_game_review_page(html: str, game_id: str) -> dict:
@@ -100,115 +270,135 @@ def parse_game_review_page(html: str, game_id: str) -> dict:
     Parse game review page HTML to extract player names, move tallies, and ratings.
     Returns a dict suitable for database storage.
     """
-    soup = BeautifulSoup(html, "html.parser")
-
+    fast = _scan_review_fields(html)
     # Try to get userDetails from embedded JSON (has usernames, gameRating, IDs)
     user_details = _extract_user_details(html)
-    white_details = user_details.get("white", {})
-    black_details = user_details.get("black", {})
+    white_details = user_details["white"]
+    black_details = user_details["black"]
+
+    data = _fast_path(html, game_id, fast, white_details, black_details)
+    if data is not None:
+        return data
+
+    tree = _parse_tree(html)
+
+    # One tree walk collects every data-cy element; lookups below use these
+    # instead of a query per field. First occurrence wins.
+    data_cy_nodes = _XP_DATA_CY(tree)
+    by_data_cy = {}
+    for el in data_cy_nodes:
+        by_data_cy.setdefault(el.get("data-cy"), el)
 
-    white_username = white_details.get("username") if isinstance(white_details, dict) else None
-    black_username = black_details.get("username") if isinstance(black_details, dict) else None
+    white_username = white_details.get("username")
+    black_username = black_details.get("username")
 
     # Fallback: parse from DOM
     if not white_username:
-        top_player = soup.select_one("[data-cy='analysis-player-Top']")
-        if top_player:
-            username_el = top_player.select_one("[data-test-element='user-tagline-username']")
-            white_username = username_el.get_text(strip=True) if username_el else None
+        top_player = by_data_cy.get("analysis-player-Top")
+        if top_player is not None:
+            username = _text(_first(_XP_USERNAME, top_player))
+            white_username = username.strip() if username else None
 
     if not black_username:
-        bottom_player = soup.select_one("[data-cy='analysis-player-Bottom']")
-        if bottom_player:
-            username_el = bottom_player.select_one("[data-test-element='user-tagline-username']")
-            black_username = username_el.get_text(strip=True) if username_el else None
+        bottom_player = by_data_cy.get("analysis-player-Bottom")
+        if bottom_player is not None:
+            username = _text(_first(_XP_USERNAME, bottom_player))
+            black_username = username.strip() if username else None
 
     # Game ratings: prefer data-cy="review-rating-1300" (has rating in attribute)
     # Else use span text from .game-overview-row .review-rating-white/black
     # Fallback to userDetails.gameRating (Elo at game time)
-    white_rating = 0
-    black_rating = 0
-    for el in soup.select("[data-cy^='review-rating-']"):
-        data_cy = el.get("data-cy", "")
-        classes = el.get("class") or []
-        try:
-            num = int(data_cy.split("-")[-1])
+    white_rating = fast.get("white_rating", 0)
+    black_rating = fast.get("black_rating", 0)
+    if white_rating == 0 or black_rating == 0:
+        # The last element per color wins; walk backwards and stop once both are seen
+        white_seen = black_seen = False
+        for el in reversed(data_cy_nodes):
+            data_cy = el.get("data-cy")
+            if not data_cy.startswith("review-rating-"):
+                continue
+            classes = (el.get("class") or "").split()
+            m = _RE_TRAILING_INT.search(data_cy)
+            if not m:
+                continue
             if "review-rating-white" in classes:
-                white_rating = num
+                if not white_seen:
+                    white_rating, white_seen = int(m.group(1)), True
             elif "review-rating-black" in classes:
-                black_rating = num
-        except (ValueError, IndexError):
-            pass
+                if not black_seen:
+                    black_rating, black_seen = int(m.group(1)), True
+            if white_seen and black_seen:
+                break
+    # One select for the overview rows, shared by the rating and accuracy fallbacks
+    need_rating = white_rating == 0 or black_rating == 0
+    need_accuracy = "white_accuracy" not in fast
+    overview_rows = _XP_OVERVIEW_ROWS(tree) if need_rating or need_accuracy else []
+
     # Fallback: span text in game-overview-row with "Game Rating" (avoids other rows)
-    if white_rating == 0 or black_rating == 0:
-        for row in soup.select(".game-overview-row"):
-            title = row.select_one(".game-overview-row-title")
-            if title and "Game Rating" in (title.get_text() or ""):
+    if need_rating:
+        for row in overview_rows:
+            title = _text(_first(_XP_ROW_TITLE, row))
+            if title and "Game Rating" in title:
                 if white_rating == 0:
-                    w_el = row.select_one(".review-rating-white span")
-                    white_rating = _safe_int(w_el.get_text() if w_el else None)
+                    white_rating = _safe_int(_text(_first(_XP_RATING_SPAN["white"], row)))
                 if black_rating == 0:
-                    b_el = row.select_one(".review-rating-black span")
-                    black_rating = _safe_int(b_el.get_text() if b_el else None)
+                    black_rating = _safe_int(_text(_first(_XP_RATING_SPAN["black"], row)))
                 break
-    if white_rating == 0 and isinstance(white_details, dict):
-        white_rating = white_details.get("gameRating") or 0
-    if black_rating == 0 and isinstance(black_details, dict):
-        black_rating = black_details.get("gameRating") or 0
+    white_rating = white_rating or white_details.get("gameRating") or 0
+    black_rating = black_rating or black_details.get("gameRating") or 0
 
     # Parse accuracy (e.g. 81.5, 76.6) - game-overview-row with "Accuracy" or data-cy
-    white_accuracy = 0.0
-    black_accuracy = 0.0
-    for row in soup.select(".game-overview-row"):
-        title = row.select_one(".game-overview-row-title")
-        if title and "Accuracy" in (title.get_text() or ""):
-            w_el = row.select_one(".review-accuracy-white span, [data-cy*='accuracy-white'] span")
-            b_el = row.select_one(".review-accuracy-black span, [data-cy*='accuracy-black'] span")
-            if w_el:
-                white_accuracy = _safe_float(w_el.get_text())
-            if b_el:
-                black_accuracy = _safe_float(b_el.get_text())
+    white_accuracy = fast.get("white_accuracy", 0.0)
+    black_accuracy = fast.get("black_accuracy", 0.0)
+    for row in (overview_rows if need_accuracy else []):
+        title = _text(_first(_XP_ROW_TITLE, row))
+        if title and "Accuracy" in title:
+            w_el = _first(_XP_ACCURACY_SPAN["white"], row)
+            b_el = _first(_XP_ACCURACY_SPAN["black"], row)
+            if w_el is not None:
+                white_accuracy = _safe_float(w_el.text_content())
+            if b_el is not None:
+                black_accuracy = _safe_float(b_el.text_content())
             if white_accuracy == 0 and black_accuracy == 0:
-                items = row.select(".game-overview-row-item")
+                items = _XP_ROW_ITEMS(row)
                 if len(items) >= 2:
-                    white_accuracy = _safe_float(items[0].get_text(strip=True))
-                    black_accuracy = _safe_float(items[1].get_text(strip=True))
+                    white_accuracy = _safe_float(items[0].text_content())
+                    black_accuracy = _safe_float(items[1].text_content())
             break
     if white_accuracy == 0 and black_accuracy == 0:
-        for el in soup.select("[data-cy^='review-accuracy-'], [data-cy^='game-review-accuracy-']"):
-            data_cy = el.get("data-cy", "")
-            classes = el.get("class") or []
-            span = el.select_one("span")
-            val = _safe_float(span.get_text() if span else None) if span else 0.0
-            if val == 0 and data_cy:
-                try:
-                    val = int(data_cy.split("-")[-1]) / 10.0
-                except (ValueError, IndexError):
-                    pass
-            if "white" in data_cy or "review-accuracy-white" in str(classes):
-                white_accuracy = val
-            elif "black" in data_cy or "review-accuracy-black" in str(classes):
-                black_accuracy = val
+        # Same last-wins walk as the ratings above
+        white_seen = black_seen = False
+        for el in reversed(data_cy_nodes):
+            data_cy = el.get("data-cy")
+            if not data_cy.startswith(("review-accuracy-", "game-review-accuracy-")):
+                continue
+            classes = (el.get("class") or "").split()
+            if "white" in data_cy or "review-accuracy-white" in classes:
+                if not white_seen:
+                    white_accuracy, white_seen = _data_cy_accuracy(el, data_cy), True
+            elif "black" in data_cy or "review-accuracy-black" in classes:
+                if not black_seen:
+                    black_accuracy, black_seen = _data_cy_accuracy(el, data_cy), True
+            if white_seen and black_seen:
+                break
 
     # Parse move tallies
     tallies = {}
-    tally_types = [
-        "Brilliant",
-        "GreatFind",
-        "Book",
-        "BestMove",
-        "Excellent",
-        "Good",
-        "Inaccuracy",
-        "Mistake",
-        "Miss",
-        "Blunder",
-    ]
-    for tally_type in tally_types:
-        white_el = soup.select_one(f"[data-cy='game-review-tallies-number-{tally_type}-white']")
-        black_el = soup.select_one(f"[data-cy='game-review-tallies-number-{tally_type}-black']")
-        tallies[f"{tally_type}_white"] = _safe_int(white_el.get_text() if white_el else None)
-        tallies[f"{tally_type}_black"] = _safe_int(black_el.get_text() if black_el else None)
+    for key, data_cy in _TALLY_FIELDS:
+        if key in fast:
+            tallies[key] = fast[key]
+            continue
+        el = by_data_cy.get(data_cy)
+        if el is None:
+            tallies[key] = 0
+        elif len(el):
+            tallies[key] = _safe_int(el.text_content())  # number wrapped in child markup
+        else:
+            # Common case <div>N</div>: read the text node directly, no subtree walk
+            try:
+                tallies[key] = int(el.text)
+            except (TypeError, ValueError):
+                tallies[key] = 0
 
     result = _extract_pgn_result(html)
 
@@ -223,3 +413,46 @@ def parse_game_review_page(html: str, game_id: str) -> dict:
         "result": result,
         **tallies,
     }
+
+
+# (game_id, blake2b digest of html) -> parsed dict, least recently used first.
+# A digest rather than hash(html): no realistic collisions, and no page strings kept alive.
+_PARSE_CACHE: OrderedDict[tuple[str, bytes], dict] = OrderedDict()
+_PARSE_CACHE_SIZE = 256
+_parse_cache_lock = threading.Lock()
+
+
+def parse_game_review_page_cached(html: str, game_id: str) -> dict:
+    """
+    Like parse_game_review_page, but reuses the earlier result when the same
+    game_id and HTML were already parsed (retries, re-runs over saved pages).
+    Each call returns its own copy, so callers may modify it.
+    """
+    key = (game_id, hashlib.blake2b(html.encode("utf-8", "surrogatepass")).digest())
+    with _parse_cache_lock:
+        data = _PARSE_CACHE.get(key)
+        if data is not None:
+            _PARSE_CACHE.move_to_end(key)
+            return dict(data)
+    data = parse_game_review_page(html, game_id)
+    with _parse_cache_lock:
+        _PARSE_CACHE[key] = data
+        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    return dict(data)
+
+
+def _parse_one(item: tuple[str, str]) -> dict:
+    html, game_id = item
+    return parse_game_review_page(html, game_id)
+
+
+def parse_games_batch(
+    items: Iterable[tuple[str, str]], max_workers: int | None = None
+) -> list[dict]:
+    """
+    Parse many (html, game_id) pairs across a process pool (one worker per CPU by default).
+    Returns parsed dicts in input order. Pages are sent to workers in chunks to amortize IPC.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_parse_one, items, chunksize=16))
@@ -0,0 +1,159 @@
+"""Tests for the SQLite database layer."""
+
+import sqlite3
+
+import pytest
+
+from chess_data_analytics.analytics import get_player_stats
+from chess_data_analytics.config import INSERT_BATCH_SIZE
+from chess_data_analytics.database import (
+    SCHEMA_VERSION,
+    _migrate_add_result_flags,
+    existing_game_ids,
+    get_connection,
+    get_readonly_connection,
+    insert_game,
+    insert_games,
+)
+
+# games table as created before the result flag columns existed
+BASELINE_SCHEMA = """
+CREATE TABLE games (
+    game_id TEXT PRIMARY KEY,
+    white_username TEXT NOT NULL,
+    black_username TEXT NOT NULL,
+    white_rating INTEGER DEFAULT 0,
+    black_rating INTEGER DEFAULT 0,
+""" + "".join(
+    f"    {t}_{color} INTEGER DEFAULT 0,\n"
+    for t in (
+        "brilliant", "great", "book", "best", "excellent",
+        "good", "inaccuracy", "mistake", "miss", "blunder",
+    )
+    for color in ("white", "black")
+) + """
+    accuracy_white REAL DEFAULT 0,
+    accuracy_black REAL DEFAULT 0,
+    result TEXT DEFAULT '',
+    created_at TEXT DEFAULT (datetime('now'))
+);
+CREATE INDEX idx_games_white ON games(white_username);
+CREATE INDEX idx_games_black ON games(black_username);
+"""
+
+BASELINE_GAMES = [
+    ("1", "alice", "bob", "1-0"),
+    ("2", "bob", "alice", "0-1"),
+    ("3", "alice", "carol", "1/2-1/2"),
+    ("4", "carol", "bob", ""),
+]
+
+
+def _make_baseline_db(path) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO games (game_id, white_username, black_username, result) VALUES (?, ?, ?, ?)",
+        BASELINE_GAMES,
+    )
+    conn.commit()
+    conn.close()
+
+
+def _assert_migrated(conn: sqlite3.Connection) -> None:
+    flags = {
+        r["game_id"]: (r["white_win"], r["black_win"], r["draw"])
+        for r in conn.execute("SELECT game_id, white_win, black_win, draw FROM games")
+    }
+    assert flags == {"1": (1, 0, 0), "2": (0, 1, 0), "3": (0, 0, 1), "4": (0, 0, 0)}
+
+    stats = {r["username"]: (r["wins"], r["losses"], r["draws"]) for r in get_player_stats(conn)}
+    assert stats == {"alice": (2, 0, 1), "bob": (0, 2, 0), "carol": (0, 0, 1)}
+
+
+def test_migrate_baseline_db_backfills_result_flags(tmp_path):
+    """Test that migrating a baseline database fills the result flags from result."""
+    db_path = tmp_path / "games.db"
+    _make_baseline_db(db_path)
+    conn = get_connection(str(db_path))
+    _assert_migrated(conn)
+    conn.close()
+
+
+def test_result_flags_migration_rolls_back_as_a_unit(tmp_path):
+    """Test that a failed backfill also undoes the flag columns, so a rerun redoes both."""
+    conn = sqlite3.connect(tmp_path / "games.db")
+    # No result column: the ALTERs succeed, then the backfill UPDATE fails
+    conn.execute("CREATE TABLE games (game_id TEXT PRIMARY KEY)")
+    conn.commit()
+    _migrate_add_result_flags(conn, {"game_id"})
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(games)")}
+    assert cols == {"game_id"}
+    conn.close()
+
+
+def test_insert_game_upserts_existing_row(tmp_path):
+    """Test that re-inserting a game_id updates its row in place instead of duplicating it."""
+    conn = get_connection(str(tmp_path / "games.db"))
+    game = {"game_id": "1", "white_username": "alice", "black_username": "bob", "result": "1-0"}
+    insert_game(conn, {**game, "Brilliant_white": 1})
+    first_created = conn.execute("SELECT created_at FROM games").fetchone()[0]
+    insert_game(conn, {**game, "result": "0-1", "Brilliant_white": 2, "Blunder_black": 3})
+
+    rows = conn.execute(
+        "SELECT white_win, black_win, draw, brilliant_white, blunder_black, created_at FROM games"
+    ).fetchall()
+    assert [tuple(r) for r in rows] == [(0, 1, 0, 2, 3, first_created)]
+    conn.close()
+
+
+def test_readonly_connection_migrates_old_schema_version(tmp_path):
+    """Test that a database with an older user_version is migrated before reading."""
+    db_path = tmp_path / "games.db"
+    _make_baseline_db(db_path)
+    conn = get_readonly_connection(str(db_path))
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    _assert_migrated(conn)
+    conn.close()
+
+
+def test_current_schema_version_skips_setup(tmp_path):
+    """Test that a database already at SCHEMA_VERSION is not set up again."""
+    db_path = str(tmp_path / "games.db")
+    get_connection(db_path).close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_games_white_stats")
+    conn.commit()
+    conn.close()
+
+    conn = get_connection(db_path)
+    indices = {r[1] for r in conn.execute("PRAGMA index_list(games)")}
+    assert "idx_games_white_stats" not in indices
+    conn.close()
+
+
+def test_readonly_connection_rejects_writes(tmp_path):
+    """Test that get_readonly_connection opens an up-to-date database read-only."""
+    db_path = str(tmp_path / "games.db")
+    get_connection(db_path).close()
+    conn = get_readonly_connection(db_path)
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        insert_game(conn, {"game_id": "1", "white_username": "alice", "black_username": "bob"})
+    conn.close()
+
+
+def test_existing_game_ids_returns_only_known_ids(tmp_path):
+    """Test that existing_game_ids picks out the stored IDs from a full collect batch."""
+    conn = get_connection(str(tmp_path / "games.db"))
+    known = {f"k{i}" for i in range(0, INSERT_BATCH_SIZE, 3)}
+    insert_games(
+        conn, [{"game_id": gid, "white_username": "a", "black_username": "b"} for gid in known]
+    )
+    conn.commit()
+
+    batch = [f"k{i}" for i in range(INSERT_BATCH_SIZE)]
+    assert len(batch) == INSERT_BATCH_SIZE
+    assert existing_game_ids(conn, batch) == known
+    assert existing_game_ids(conn, ["missing"]) == set()
+    assert existing_game_ids(conn, []) == set()
+    conn.close()
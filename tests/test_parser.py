@@ -3,7 +3,12 @@
 import pytest
 from pathlib import Path
 
-from chess_data_analytics.parser import parse_game_review_page, parse_pgn_text
+from chess_data_analytics.parser import (
+    parse_game_review_page,
+    parse_game_review_page_cached,
+    parse_games_batch,
+    parse_pgn_text,
+)
 
 # Sample game HTML files (relative to project root)
 SAMPLE_GAMES_DIR = Path(__file__).resolve().parent.parent / "sample_games"
@@ -166,3 +171,54 @@ def test_parse_with_user_details_json():
     data = parse_game_review_page(html, "123")
     assert data["white_username"] == "white_player"
     assert data["black_username"] == "black_player"
+
+
+def test_parse_tally_with_nested_markup_falls_back_to_dom():
+    """Test that tallies wrapped in extra elements are still read via the DOM."""
+    html = SAMPLE_HTML.replace(
+        '<div data-cy="game-review-tallies-number-Book-white">5</div>',
+        '<div data-cy="game-review-tallies-number-Book-white"><span> 7 </span></div>',
+    )
+    data = parse_game_review_page(html, "123")
+    assert data["Book_white"] == 7
+    assert data["Book_black"] == 5
+
+    # A later duplicate with a plain number must not win over the first element
+    html = html.replace(
+        '<div data-cy="game-review-tallies-number-Book-black">5</div>',
+        '<div data-cy="game-review-tallies-number-Book-black">5</div>\n'
+        '<div data-cy="game-review-tallies-number-Book-white">9</div>',
+    )
+    data = parse_game_review_page(html, "123")
+    assert data["Book_white"] == 7
+
+
+def test_parse_page_with_encoding_declaration():
+    """Test that a saved page starting with an XML encoding declaration still parses."""
+    html = '<?xml version="1.0" encoding="utf-8"?>' + SAMPLE_HTML
+    data = parse_game_review_page(html, "123")
+    assert data == parse_game_review_page(SAMPLE_HTML, "123")
+    assert data["white_username"] == "white_player"
+    assert data["black_username"] == "black_player"
+    assert data["white_rating"] == 1300
+    assert data["black_rating"] == 1450
+
+
+def test_parse_cached_reuses_result_for_same_page():
+    """Test that the cached parser returns the stored result for repeated input."""
+    first = parse_game_review_page_cached(SAMPLE_HTML, "123")
+    assert first == parse_game_review_page(SAMPLE_HTML, "123")
+    # Callers get their own copy, so changing one cannot corrupt the cache
+    first["white_username"] = "changed"
+    again = parse_game_review_page_cached(SAMPLE_HTML, "123")
+    assert again is not first
+    assert again["white_username"] == "white_player"
+    assert parse_game_review_page_cached(SAMPLE_HTML, "456")["game_id"] == "456"
+
+
+def test_parse_games_batch_matches_single_parse():
+    """Test that batch parsing returns the same results as parsing one by one, in order."""
+    items = [(SAMPLE_HTML, "1"), (SAMPLE_HTML.replace("white_player", "someone"), "2")]
+    results = parse_games_batch(items, max_workers=2)
+    assert results == [parse_game_review_page(html, game_id) for html, game_id in items]
+    assert results[1]["white_username"] == "someone"